@@ -10,18 +10,147 @@ Created on Fri Sep  5 20:56:53 2025
 Simulador de Energía Solar para Medellín
 """
 
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import matplotlib.pyplot as plt
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
+from functools import lru_cache, wraps
 import requests
-import json
-from matplotlib.patches import Rectangle
-import ipywidgets as widgets
-from IPython.display import display, clear_output
 import warnings
 warnings.filterwarnings('ignore')
 
+# Numba es opcional: si no está instalado se usa la versión vectorizada con NumPy
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# orjson es opcional: decodifica la respuesta de la API más rápido que json
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+# Una sesión HTTP por hilo (reutiliza la conexión con Open-Meteo entre simulaciones;
+# requests no garantiza que una misma sesión sea segura entre hilos)
+_thread_local = threading.local()
+
+def _get_session():
+    """Devuelve la sesión HTTP del hilo actual, creándola la primera vez"""
+    session = getattr(_thread_local, 'session', None)
+    if session is None:
+        session = _thread_local.session = requests.Session()
+    return session
+
+# Hilos para descargar los datos reales mientras se calcula la simulación
+_pool = ThreadPoolExecutor(max_workers=2)
+
+@lru_cache(maxsize=256)
+def _fetch_solar(lat, lon, date_iso):
+    """Descarga la radiación horaria de Open-Meteo; las respuestas exitosas quedan en caché.
+
+    Una respuesta incompleta o mal formada lanza una excepción (KeyError, TypeError, ...)
+    en lugar de devolver un valor, para que `lru_cache` no la guarde.
+    """
+    url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&start_date={date_iso}&end_date={date_iso}&hourly=direct_radiation,diffuse_radiation&timezone=auto"
+    
+    response = _get_session().get(url, timeout=5)
+    response.raise_for_status()
+    data = _json_loads(response.content)
+    
+    hourly = data['hourly']
+    return (tuple(hourly['direct_radiation']),
+            tuple(hourly['diffuse_radiation']))
+
+def debounce(wait):
+    """Agrupa llamadas seguidas: la función solo se ejecuta tras `wait` segundos sin nuevas llamadas.
+
+    Usa el bucle de eventos del kernel de Jupyter para que la salida de la función
+    siga capturándose en los widgets; sin bucle activo se ejecuta de inmediato.
+    """
+    def decorator(fn):
+        pending = None
+        
+        @wraps(fn)
+        def debounced(*args, **kwargs):
+            nonlocal pending
+            if pending is not None:
+                pending.cancel()
+                pending = None
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return fn(*args, **kwargs)
+            pending = loop.call_later(wait, lambda: fn(*args, **kwargs))
+        
+        return debounced
+    return decorator
+
+def _panel_efficiency(efficiency, temp_coeff, temperature):
+    """Eficiencia del panel corregida por temperatura (referencia de 25 °C)"""
+    return efficiency * (1 + temp_coeff * (temperature - 25))
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True, parallel=True)
+    def _solar_kernel(hours, lon, sin_lat, cos_lat, sin_dec, cos_dec, extraterrestrial_irradiance,
+                      cloud_cover, sin_tilt, cos_tilt, panel_azimuth, panel_efficiency, panel_area):
+        """Núcleo compilado: posición solar, irradiancia y potencia en una sola pasada por hora.
+
+        Replica `calculate_solar_position`, `calculate_irradiance`,
+        `calculate_irradiance_on_tilted_surface` y `calculate_power_output` sin
+        arreglos intermedios. Ángulos en radianes.
+        """
+        n = hours.size
+        altitudes = np.empty(n, dtype=hours.dtype)
+        azimuths = np.empty(n, dtype=hours.dtype)
+        ghi = np.empty(n, dtype=hours.dtype)
+        dhi = np.empty(n, dtype=hours.dtype)
+        diffuse = np.empty(n, dtype=hours.dtype)
+        tilted = np.empty(n, dtype=hours.dtype)
+        power = np.empty(n, dtype=hours.dtype)
+        
+        time_offset = (4 * lon) / 60  # Simplificado
+        diffuse_fraction = 0.2 + 0.6 * cloud_cover
+        dni_scale = extraterrestrial_irradiance * (1 - cloud_cover * 0.75)
+        sky_view = (1 + cos_tilt) / 2
+        power_factor = panel_area * panel_efficiency
+        
+        for i in prange(n):
+            # Posición solar
+            ha_rad = np.radians(15 * (hours[i] + time_offset - 12))
+            cos_ha = np.cos(ha_rad)
+            # En float32 el seno puede redondearse por encima de 1 con el sol en el cenit
+            altitude = np.arcsin(min(1.0, max(-1.0, sin_lat * sin_dec + cos_lat * cos_dec * cos_ha)))
+            azimuth = np.arctan2(-np.sin(ha_rad) * cos_dec,
+                                 sin_dec * cos_lat - cos_dec * sin_lat * cos_ha) % (2 * np.pi)
+            altitude = max(0.0, altitude)
+            
+            # Irradiancia horizontal
+            sin_alt = np.sin(altitude)
+            dhi_i = 0.0
+            if altitude > 0:
+                air_mass = 1 / sin_alt
+                dhi_i = dni_scale * (0.7 ** (air_mass ** 0.678)) * sin_alt
+            diffuse_i = dhi_i * diffuse_fraction
+            
+            # Irradiancia en el panel inclinado
+            cos_incidence = sin_alt * cos_tilt + np.cos(altitude) * sin_tilt * np.cos(azimuth - panel_azimuth)
+            rb = max(0.0, cos_incidence / max(0.087, sin_alt))
+            tilted_i = dhi_i * (rb + sky_view)
+            
+            altitudes[i] = altitude
+            azimuths[i] = azimuth
+            ghi[i] = dhi_i + diffuse_i
+            dhi[i] = dhi_i
+            diffuse[i] = diffuse_i
+            tilted[i] = tilted_i
+            power[i] = max(0.0, tilted_i * power_factor)
+        
+        return altitudes, azimuths, ghi, dhi, diffuse, tilted, power
+
 class SolarEnergySimulator:
     def __init__(self):
         # Constantes
@@ -31,6 +160,8 @@ class SolarEnergySimulator:
             'policristalino': {'efficiency': 0.15, 'temp_coeff': -0.0045},
             'película_delgada': {'efficiency': 0.10, 'temp_coeff': -0.002}
         }
+        self.CLOUD_COVER = 0.5  # Mayor nubosidad para Medellín
+        self.AMBIENT_TEMPERATURE = 28  # °C, temperatura ambiente más alta para Medellín
         
         # Parámetros por defecto para Medellín
         self.latitude = 6.2442  # Medellín
@@ -41,54 +172,52 @@ class SolarEnergySimulator:
         self.tilt_angle = 10  # grados (optimizado para Medellín cerca del ecuador)
         self.azimuth_angle = 180  # grados (0=N, 90=E, 180=S, 270=W)
         
-    def calculate_solar_position(self, date, hour, lat, lon):
-        """Calcula la posición solar (altitud y azimut) para una fecha, hora y ubicación dadas"""
-        # Día juliano (día del año)
-        day_of_year = date.timetuple().tm_yday
+        # Figura compartida entre simulaciones (se crea en el primer `visualize_results`)
+        self._fig = None
+        self._axes = None
+        self._sun_path = None
+        
+        # Núcleos de simulación especializados (ver `_compile_kernel`)
+        self._kernels = {}
         
+    def calculate_solar_position(self, hours, lon, sin_lat, cos_lat, sin_dec, cos_dec):
+        """Calcula la posición solar (altitud y azimut) para las horas y ubicación dadas.
+
+        `hours` puede ser un escalar o un arreglo de NumPy; el resultado tiene la misma forma.
+        Los senos y cosenos de latitud y declinación se precalculan en `run_simulation`.
+        Devuelve altitud y azimut en radianes.
+        """
         # Conversión de hora a hora solar
         time_offset = (4 * (lon) + 60 * (0)) / 60  # Simplificado
-        solar_time = hour + time_offset
+        solar_time = np.asarray(hours) + time_offset
         
         # Ángulo horario (grados)
         hour_angle = 15 * (solar_time - 12)
         
-        # Declinación solar (grados)
-        declination = 23.45 * np.sin(np.radians(360 * (284 + day_of_year) / 365))
-        
-        # Altitud solar (grados)
-        lat_rad = np.radians(lat)
-        dec_rad = np.radians(declination)
+        # Altitud solar (radianes)
         ha_rad = np.radians(hour_angle)
+        cos_ha = np.cos(ha_rad)
         
-        sin_altitude = (np.sin(lat_rad) * np.sin(dec_rad) + 
-                       np.cos(lat_rad) * np.cos(dec_rad) * np.cos(ha_rad))
-        altitude = np.degrees(np.arcsin(sin_altitude))
-        
-        # Azimut solar (grados)
-        cos_azimuth = ((np.sin(dec_rad) * np.cos(lat_rad) - 
-                       np.cos(dec_rad) * np.sin(lat_rad) * np.cos(ha_rad)) / 
-                      np.cos(np.radians(altitude)))
-        azimuth = np.degrees(np.arccos(np.clip(cos_azimuth, -1, 1)))
+        sin_altitude = sin_lat * sin_dec + cos_lat * cos_dec * cos_ha
+        # En float32 el seno puede redondearse por encima de 1 con el sol en el cenit
+        altitude = np.arcsin(np.clip(sin_altitude, -1, 1))
         
-        # Ajustar azimut según mañana/tarde
-        if hour_angle > 0:
-            azimuth = 360 - azimuth
+        # Azimut solar (radianes, desde el Norte en sentido horario; el signo
+        # del ángulo horario distingue mañana y tarde sin ramas)
+        azimuth = np.arctan2(-np.sin(ha_rad) * cos_dec,
+                             sin_dec * cos_lat - cos_dec * sin_lat * cos_ha) % (2 * np.pi)
         
-        return max(0, altitude), azimuth
+        return np.maximum(0, altitude), azimuth
     
-    def calculate_irradiance(self, altitude, date, cloud_cover=0.5):
-        """Calcula la irradiancia solar considerando efectos atmosféricos"""
-        # Irradiancia extraterrestre
-        day_of_year = date.timetuple().tm_yday
-        n = 1 + 0.033 * np.cos(np.radians(360 * day_of_year / 365))
-        extraterrestrial_irradiance = self.SOLAR_CONSTANT * n
+    def calculate_irradiance(self, altitude, extraterrestrial_irradiance, cloud_cover=0.5):
+        """Calcula la irradiancia solar considerando efectos atmosféricos (altitud en radianes, acepta arreglos)"""
+        # Sol bajo el horizonte: sin irradiancia
+        sun_up = altitude > 0
+        sin_alt = np.sin(altitude)
         
-        if altitude <= 0:
-            return 0, 0, 0
-        
-        # Masa de aire
-        air_mass = 1 / np.sin(np.radians(altitude))
+        # Masa de aire (infinita con el sol en el horizonte; se anula abajo)
+        with np.errstate(divide='ignore'):
+            air_mass = 1 / sin_alt
         
         # Transmitancia atmosférica (modelo simplificado)
         # Aumentamos la nubosidad promedio para Medellín
@@ -98,7 +227,7 @@ class SolarEnergySimulator:
         dni = extraterrestrial_irradiance * atmospheric_transmittance
         
         # Irradiancia directa horizontal (DHI)
-        dhi = dni * np.sin(np.radians(altitude))
+        dhi = np.where(sun_up, dni * sin_alt, 0)
         
         # Irradiancia difusa horizontal (modelo simplificado)
         # Mayor fracción difusa por la nubosidad de Medellín
@@ -111,21 +240,35 @@ class SolarEnergySimulator:
         return ghi, dhi, diffuse_irradiance
     
     def calculate_irradiance_on_tilted_surface(self, ghi, dhi, altitude, azimuth, 
-                                             tilt_angle, azimuth_angle):
-        """Calcula la irradiancia en una superficie inclinada"""
+                                             sin_tilt, cos_tilt, azimuth_angle):
+        """Calcula la irradiancia en una superficie inclinada.
+
+        Los ángulos (altitud, azimut solar y azimut del panel) están en radianes; la
+        inclinación del panel se recibe como seno y coseno precalculados.
+        Si la inclinación o el azimut del panel son arreglos 1-D (varias orientaciones),
+        el resultado tiene forma (n_horas, n_orientaciones).
+        """
+        # Varias orientaciones: el eje de horas pasa a columna y se difunde contra ellas
+        if np.ndim(cos_tilt) > 0 or np.ndim(azimuth_angle) > 0:
+            altitude = np.asarray(altitude)[..., None]
+            azimuth = np.asarray(azimuth)[..., None]
+            dhi = np.asarray(dhi)[..., None]
+        
+        sin_alt = np.sin(altitude)
+        cos_alt = np.cos(altitude)
+        
         # Ángulo de incidencia
-        cos_incidence = (np.sin(np.radians(altitude)) * np.cos(np.radians(tilt_angle)) +
-                        np.cos(np.radians(altitude)) * np.sin(np.radians(tilt_angle)) *
-                        np.cos(np.radians(azimuth - azimuth_angle)))
+        cos_incidence = (sin_alt * cos_tilt +
+                        cos_alt * sin_tilt * np.cos(azimuth - azimuth_angle))
         
         # Factor de inclinación para radiación directa
-        rb = max(0, cos_incidence / max(0.087, np.sin(np.radians(altitude))))
+        rb = np.maximum(0, cos_incidence / np.maximum(0.087, sin_alt))
         
         # Radiación directa en superficie inclinada
         direct_tilted = dhi * rb
         
         # Radiación difusa en superficie inclinada (modelo isotrópico)
-        diffuse_tilted = dhi * ((1 + np.cos(np.radians(tilt_angle))) / 2)
+        diffuse_tilted = dhi * ((1 + cos_tilt) / 2)
         
         # Radiación total en superficie inclinada
         total_tilted = direct_tilted + diffuse_tilted
@@ -135,81 +278,179 @@ class SolarEnergySimulator:
     def calculate_power_output(self, irradiance, panel_type, panel_area, temperature=25):
         """Calcula la potencia de salida del panel fotovoltaico"""
         panel_params = self.PANEL_TYPES[panel_type]
-        efficiency = panel_params['efficiency'] * (1 + panel_params['temp_coeff'] * (temperature - 25))
-        power = irradiance * panel_area * efficiency
-        return max(0, power)
+        efficiency = _panel_efficiency(panel_params['efficiency'], panel_params['temp_coeff'], temperature)
+        # Factores escalares primero: una sola pasada sobre el arreglo de irradiancia
+        power = irradiance * (panel_area * efficiency)
+        return np.maximum(0, power)
     
     def get_real_solar_data(self, lat, lon, date):
         """Obtiene datos reales de radiación solar de la API de Open-Meteo"""
         try:
-            start_date = date.strftime("%Y-%m-%d")
-            end_date = date.strftime("%Y-%m-%d")
+            # Redondeo a 3 decimales para aprovechar la caché al mover los sliders
+            radiation = _fetch_solar(round(lat, 3), round(lon, 3), date.isoformat())
+        except (requests.RequestException, ValueError, KeyError, TypeError):
+            return None, None, None
+        
+        direct_rad = np.asarray(radiation[0], dtype=np.float32)
+        diffuse_rad = np.asarray(radiation[1], dtype=np.float32)
+        hours = np.arange(direct_rad.size, dtype=np.int8)  # 24 valores horarios
+        return hours, direct_rad, diffuse_rad
+    
+    def _day_terms(self, day_of_year):
+        """Seno y coseno de la declinación e irradiancia extraterrestre (float32).
+
+        `day_of_year` puede ser un escalar o un arreglo de días.
+        """
+        declination = np.radians(23.45 * np.sin(np.radians(360 * (284 + day_of_year) / 365)))
+        extraterrestrial_irradiance = self.SOLAR_CONSTANT * (1 + 0.033 * np.cos(np.radians(360 * day_of_year / 365)))
+        return (np.float32(np.sin(declination)), np.float32(np.cos(declination)),
+                np.float32(extraterrestrial_irradiance))
+    
+    def _site_terms(self, latitude, tilt_angle, azimuth_angle):
+        """Seno y coseno de la latitud y de la inclinación, y azimut del panel en radianes (float32)"""
+        lat_rad = np.radians(latitude)
+        tilt_rad = np.radians(tilt_angle)
+        return (np.float32(np.sin(lat_rad)), np.float32(np.cos(lat_rad)),
+                np.float32(np.sin(tilt_rad)), np.float32(np.cos(tilt_rad)),
+                np.float32(np.radians(azimuth_angle)))
+    
+    def _compile_kernel(self, panel_type, use_numba=NUMBA_AVAILABLE):
+        """Devuelve el núcleo de la simulación con los parámetros fijos ya incorporados.
+
+        Los núcleos se guardan en `self._kernels` con los valores del panel, la nubosidad
+        y la temperatura ambiente como clave: si cambian, se crea un núcleo nuevo.
+        """
+        panel_params = self.PANEL_TYPES[panel_type]
+        key = (panel_params['efficiency'], panel_params['temp_coeff'],
+               self.CLOUD_COVER, self.AMBIENT_TEMPERATURE, use_numba)
+        kernel = self._kernels.get(key)
+        if kernel is None:
+            kernel = self._kernels[key] = self._build_kernel(*key)
+        return kernel
+    
+    def _build_kernel(self, efficiency, temp_coeff, cloud_cover, temperature, use_numba):
+        """Crea un cierre con los parámetros fijos (Numba si `use_numba`, si no NumPy)"""
+        panel_efficiency = _panel_efficiency(efficiency, temp_coeff, temperature)
+        
+        if use_numba:
+            def kernel(hours, lon, sin_lat, cos_lat, sin_dec, cos_dec, extraterrestrial_irradiance,
+                       sin_tilt, cos_tilt, panel_azimuth, panel_area):
+                return _solar_kernel(
+                    hours, lon, sin_lat, cos_lat, sin_dec, cos_dec, extraterrestrial_irradiance,
+                    cloud_cover, sin_tilt, cos_tilt, panel_azimuth, panel_efficiency, panel_area)
+            return kernel
+        
+        def kernel(hours, lon, sin_lat, cos_lat, sin_dec, cos_dec, extraterrestrial_irradiance,
+                   sin_tilt, cos_tilt, panel_azimuth, panel_area):
+            # Calcular posición solar para todas las horas a la vez (radianes)
+            altitudes, azimuths = self.calculate_solar_position(
+                hours, lon, sin_lat, cos_lat, sin_dec, cos_dec)
             
-            url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&start_date={start_date}&end_date={end_date}&hourly=direct_radiation,diffuse_radiation&timezone=auto"
+            # Calcular irradiancia
+            ghi, dhi, diffuse = self.calculate_irradiance(
+                altitudes, extraterrestrial_irradiance, cloud_cover=cloud_cover)
             
-            response = requests.get(url)
-            data = response.json()
+            # Calcular irradiancia en superficie inclinada
+            tilted, _, _ = self.calculate_irradiance_on_tilted_surface(
+                ghi, dhi, altitudes, azimuths, sin_tilt, cos_tilt, panel_azimuth)
             
-            if 'hourly' in data:
-                hours = list(range(24))
-                direct_rad = data['hourly']['direct_radiation']
-                diffuse_rad = data['hourly']['diffuse_radiation']
-                return hours, direct_rad, diffuse_rad
-            else:
-                return None, None, None
-        except:
-            return None, None, None
+            # Calcular potencia de salida
+            power = np.maximum(0, tilted * (panel_area * panel_efficiency))
+            return altitudes, azimuths, ghi, dhi, diffuse, tilted, power
+        return kernel
     
     def run_simulation(self, latitude, longitude, date, panel_type, panel_area, tilt_angle, azimuth_angle):
         """Ejecuta la simulación completa"""
         # Para Medellín, extendemos el rango horario ya que hay más horas de luz
-        hours = np.linspace(5, 19, 15)  # De 5am a 7pm
-        altitudes = []
-        azimuths = []
-        ghi_values = []
-        dhi_values = []
-        diffuse_values = []
-        tilted_values = []
-        power_values = []
-        
-        # Obtener datos reales para comparación
-        real_hours, real_direct, real_diffuse = self.get_real_solar_data(latitude, longitude, date)
-        
-        for hour in hours:
-            # Calcular posición solar
-            altitude, azimuth = self.calculate_solar_position(date, hour, latitude, longitude)
-            altitudes.append(altitude)
-            azimuths.append(azimuth)
-            
-            # Calcular irradiancia (mayor nubosidad para Medellín)
-            ghi, dhi, diffuse = self.calculate_irradiance(altitude, date, cloud_cover=0.5)
-            ghi_values.append(ghi)
-            dhi_values.append(dhi)
-            diffuse_values.append(diffuse)
-            
-            # Calcular irradiancia en superficie inclinada
-            tilted_irradiance, _, _ = self.calculate_irradiance_on_tilted_surface(
-                ghi, dhi, altitude, azimuth, tilt_angle, azimuth_angle)
-            tilted_values.append(tilted_irradiance)
-            
-            # Calcular potencia de salida (temperatura ambiente más alta para Medellín)
-            power = self.calculate_power_output(tilted_irradiance, panel_type, panel_area, temperature=28)
-            power_values.append(power)
+        # Se trabaja en float32: el modelo es aproximado y la precisión simple basta
+        hours = np.linspace(5, 19, 15, dtype=np.float32)  # De 5am a 7pm
+        
+        # Obtener datos reales para comparación (en paralelo con el cálculo)
+        real_future = _pool.submit(self.get_real_solar_data, latitude, longitude, date)
+        
+        # Términos invariantes durante el día (se calculan una sola vez)
+        sin_dec, cos_dec, extraterrestrial_irradiance = self._day_terms(date.timetuple().tm_yday)
+        sin_lat, cos_lat, sin_tilt, cos_tilt, panel_azimuth = self._site_terms(
+            latitude, tilt_angle, azimuth_angle)
+        
+        # Núcleo especializado para el tipo de panel (Numba si está disponible, si no NumPy)
+        kernel = self._compile_kernel(panel_type)
+        (altitudes_rad, azimuths_rad, ghi_values, dhi_values, diffuse_values,
+         tilted_values, power_values) = kernel(
+            hours, longitude, sin_lat, cos_lat, sin_dec, cos_dec, extraterrestrial_irradiance,
+            sin_tilt, cos_tilt, panel_azimuth, panel_area)
+        
+        # Cualquier fallo al obtener los datos reales (tiempo agotado, respuesta mal
+        # formada, ...) solo deja la simulación sin datos de comparación
+        try:
+            real_hours, real_direct, real_diffuse = real_future.result(timeout=5)
+        except Exception:
+            real_hours, real_direct, real_diffuse = None, None, None
         
         return {
             'hours': hours,
-            'altitudes': altitudes,
-            'azimuths': azimuths,
+            'altitudes': np.degrees(altitudes_rad),
+            'azimuths': np.degrees(azimuths_rad),
             'ghi': ghi_values,
             'dhi': dhi_values,
             'diffuse': diffuse_values,
             'tilted': tilted_values,
             'power': power_values,
-            'real_data': (real_hours, real_direct, real_diffuse) if real_hours else None
+            'real_data': (real_hours, real_direct, real_diffuse) if real_hours is not None else None
+        }
+    
+    def run_simulation_range(self, latitude, longitude, date_start, date_end, panel_type,
+                             panel_area, tilt_angle, azimuth_angle):
+        """Ejecuta la simulación para todos los días entre `date_start` y `date_end` (inclusive).
+
+        Los días forman un eje (n_dias, 1) y las horas otro (1, n_horas); la difusión de
+        NumPy produce directamente los resultados (n_dias, n_horas) en una sola pasada.
+        Lanza `ValueError` si `date_end` es anterior a `date_start`.
+        """
+        if date_end < date_start:
+            raise ValueError(f"date_end ({date_end}) es anterior a date_start ({date_start})")
+        
+        hours = np.linspace(5, 19, 15, dtype=np.float32)  # De 5am a 7pm
+        dates = np.arange(np.datetime64(date_start, 'D'), np.datetime64(date_end, 'D') + 1)
+        day_of_year = (dates - dates.astype('datetime64[Y]')).astype(int) + 1
+        
+        # Términos por día como columna
+        sin_dec, cos_dec, extraterrestrial_irradiance = self._day_terms(day_of_year[:, None])
+        
+        # Latitud y orientación del panel
+        sin_lat, cos_lat, sin_tilt, cos_tilt, panel_azimuth = self._site_terms(
+            latitude, tilt_angle, azimuth_angle)
+        
+        # Posición solar, irradiancia y potencia sobre la malla días × horas, con los
+        # mismos parámetros fijos que `run_simulation` (núcleo NumPy: Numba es 1-D)
+        kernel = self._compile_kernel(panel_type, use_numba=False)
+        altitudes, azimuths, ghi, dhi, diffuse, tilted, power = kernel(
+            hours[None, :], longitude, sin_lat, cos_lat, sin_dec, cos_dec, extraterrestrial_irradiance,
+            sin_tilt, cos_tilt, panel_azimuth, panel_area)
+        
+        # Energía diaria por la regla del trapecio (Wh)
+        daily_energy = 0.5 * np.sum((power[:, 1:] + power[:, :-1]) * np.diff(hours), axis=1)
+        
+        return {
+            'dates': dates,
+            'hours': hours,
+            'altitudes': np.degrees(altitudes),
+            'azimuths': np.degrees(azimuths),
+            'ghi': ghi,
+            'dhi': dhi,
+            'diffuse': diffuse,
+            'tilted': tilted,
+            'power': power,
+            'daily_energy': daily_energy,
+            'total_energy': daily_energy.sum()
         }
     
     def create_interactive_ui(self):
         """Crea una interfaz interactiva para el usuario"""
+        # Solo se necesitan en Jupyter; se importan aquí para no cargarlos al usar el simulador desde scripts
+        import ipywidgets as widgets
+        from IPython.display import display, clear_output
+        
         # Widgets de entrada con valores por defecto para Medellín
         lat_slider = widgets.FloatSlider(value=6.2442, min=-90, max=90, step=0.1, description='Latitud:')
         lon_slider = widgets.FloatSlider(value=-75.5812, min=-180, max=180, step=0.1, description='Longitud:')
@@ -227,10 +468,15 @@ class SolarEnergySimulator:
         right_panel = widgets.VBox([area_slider, tilt_slider, azimuth_slider, run_button])
         ui = widgets.HBox([left_panel, right_panel])
         
-        # Función de callback para el botón
+        # Función de callback para el botón y los controles (150 ms sin cambios antes de simular)
+        @debounce(0.15)
         def on_run_button_clicked(b):
             with output:
                 clear_output()
+                # Al borrar la fecha del selector su valor es None: no hay nada que simular
+                if date_picker.value is None:
+                    print("Seleccione una fecha para ejecutar la simulación")
+                    return
                 self.latitude = lat_slider.value
                 self.longitude = lon_slider.value
                 self.date = date_picker.value
@@ -251,6 +497,11 @@ class SolarEnergySimulator:
         
         run_button.on_click(on_run_button_clicked)
         
+        # Actualización en vivo al mover los controles
+        for control in (lat_slider, lon_slider, date_picker, panel_dropdown,
+                        area_slider, tilt_slider, azimuth_slider):
+            control.observe(on_run_button_clicked, names='value')
+        
         # Mostrar la interfaz
         display(ui, output)
         
@@ -270,7 +521,15 @@ class SolarEnergySimulator:
         power_values = results['power']
         real_data = results['real_data']
         
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 12))
+        # Reutilizar la figura si sigue abierta; el backend inline de Jupyter la cierra tras mostrarla
+        new_figure = self._fig is None or not plt.fignum_exists(self._fig.number)
+        if new_figure:
+            self._create_figure()
+        else:
+            # El diagrama polar se conserva; solo se actualiza su línea
+            for ax in self._axes.flat[:3]:
+                ax.clear()
+        (ax1, ax2), (ax3, ax4) = self._axes
         
         # Gráfico 1: Altitud solar
         ax1.plot(hours, altitudes, 'b-', linewidth=2, marker='o')
@@ -297,10 +556,10 @@ class SolarEnergySimulator:
         # Añadir datos reales si están disponibles
         if real_data:
             real_hours, real_direct, real_diffuse = real_data
-            real_global = [d + df for d, df in zip(real_direct, real_diffuse)]
-            ax3.plot(real_hours, real_global[:24], 'g--', label='GHI Real', alpha=0.7)
-            ax3.plot(real_hours, real_direct[:24], 'b--', label='DNI Real', alpha=0.7)
-            ax3.plot(real_hours, real_diffuse[:24], '--', color='orange', label='Difusa Real', alpha=0.7)
+            real_global = real_direct + real_diffuse
+            ax3.plot(real_hours, real_global, 'g--', label='GHI Real', alpha=0.7)
+            ax3.plot(real_hours, real_direct, 'b--', label='DNI Real', alpha=0.7)
+            ax3.plot(real_hours, real_diffuse, '--', color='orange', label='Difusa Real', alpha=0.7)
         
         ax3.set_xlabel('Hora del día')
         ax3.set_ylabel('Irradiancia (W/m²)')
@@ -309,23 +568,22 @@ class SolarEnergySimulator:
         ax3.grid(True, alpha=0.3)
         ax3.set_xticks(range(0, 24, 2))
         
-        # Gráfico 4: Diagrama de posición solar
+        # Gráfico 4: Diagrama de posición solar (ejes configurados en `_create_figure`)
         azimuths_rad = np.radians(results['azimuths'])
-        ax4 = plt.subplot(2, 2, 4, projection='polar')
-        ax4.plot(azimuths_rad, results['altitudes'], 'ro-', linewidth=2)
-        ax4.set_theta_zero_location('N')
-        ax4.set_theta_direction(-1)
-        ax4.set_rlabel_position(0)
-        ax4.set_ylim(0, 90)
-        ax4.set_title('Trayectoria Solar - Medellín (Coordenadas Polares)', va='bottom')
+        self._sun_path.set_data(azimuths_rad, results['altitudes'])
         
-        plt.tight_layout()
-        plt.show()
+        if new_figure:
+            self._fig.tight_layout()
+            plt.show()
+        else:
+            self._redisplay_figure()
         
         # Calcular estadísticas
-        total_energy = np.trapz(power_values, hours)  # Wh
-        max_power = max(power_values)
-        max_irradiance = max(results['tilted'])
+        # Regla del trapecio (Wh)
+        dh = np.diff(hours)
+        total_energy = 0.5 * np.sum((power_values[1:] + power_values[:-1]) * dh)
+        max_power = power_values.max()
+        max_irradiance = results['tilted'].max()
         
         # Información específica de Medellín
         print("="*60)
@@ -354,6 +612,54 @@ class SolarEnergySimulator:
             print("\nNota: Los datos reales (líneas discontinuas) se obtuvieron de la API de Open-Meteo")
         else:
             print("\nNota: No se pudieron obtener datos reales de la API")
+    
+    def _create_figure(self):
+        """Crea la figura de resultados y configura una sola vez el diagrama polar"""
+        self._fig = plt.figure(figsize=(15, 12))
+        ax1 = self._fig.add_subplot(2, 2, 1)
+        ax2 = self._fig.add_subplot(2, 2, 2)
+        ax3 = self._fig.add_subplot(2, 2, 3)
+        ax4 = self._fig.add_subplot(2, 2, 4, projection='polar')
+        self._axes = np.array([[ax1, ax2], [ax3, ax4]])
+        
+        # Gráfico 4: Diagrama de posición solar (0° = Norte, sentido horario)
+        ax4.set_theta_zero_location('N')
+        ax4.set_theta_direction(-1)
+        ax4.set_rlabel_position(0)
+        ax4.set_ylim(0, 90)
+        ax4.set_title('Trayectoria Solar - Medellín (Coordenadas Polares)', va='bottom')
+        self._sun_path, = ax4.plot([], [], 'ro-', linewidth=2)
+    
+    def _redisplay_figure(self):
+        """Redibuja la figura reutilizada y la vuelve a mostrar en Jupyter.
+
+        La interfaz llama a `clear_output()` antes de cada simulación, lo que borra la
+        figura ya mostrada; con backends interactivos (`%matplotlib widget`/`notebook`)
+        hay que volver a mostrar su lienzo en la salida actual.
+        """
+        self._fig.canvas.draw_idle()
+        try:
+            from IPython import get_ipython
+            from IPython.display import display
+        except ImportError:
+            return
+        
+        # Fuera de un kernel de Jupyter (scripts, consola con ventana Qt) basta con redibujar
+        if getattr(get_ipython(), 'kernel', None) is None:
+            return
+        canvas = self._fig.canvas
+        if hasattr(canvas, '_repr_mimebundle_') or hasattr(canvas, '_ipython_display_'):
+            display(canvas)  # Lienzo interactivo (ipympl)
+        else:
+            display(self._fig)
+    
+    def close_figure(self):
+        """Cierra la figura compartida de resultados"""
+        if self._fig is not None:
+            plt.close(self._fig)
+            self._fig = None
+            self._axes = None
+            self._sun_path = None
 
 # Ejecutar la aplicación
 if __name__ == "__main__":